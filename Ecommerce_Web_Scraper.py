@@ -1,28 +1,142 @@
+import asyncio
+import aiohttp
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from bs4 import BeautifulSoup, SoupStrainer
 import sqlite3
-import pandas as pd
-from flask import Flask, render_template_string, request, jsonify, redirect, url_for
+import openpyxl
+from flask import Flask, render_template, request, jsonify, redirect, url_for, g
+from flask_compress import Compress
 import time
-import random
+import hashlib
 from urllib.parse import urljoin, urlparse
 import re
 import os
-from datetime import datetime
+from concurrent.futures import Future, ThreadPoolExecutor
+import queue
+import threading
+from datetime import datetime, timezone
+from itertools import chain, islice
+from functools import partial
+from email.utils import parsedate_to_datetime
+
+# Scraped fields, in the column order used for inserts and exports
+BOOK_COLUMNS = ('title', 'price', 'rating', 'availability', 'description',
+                'image_url', 'product_url', 'category', 'upc')
+
+# Rows per multi-row INSERT; keeps the bound parameters under SQLite's historical 999 limit
+INSERT_BATCH_ROWS = 999 // len(BOOK_COLUMNS)
+
+PRODUCT_POD_STRAINER = SoupStrainer('article', class_='product_pod')
+
+PRICE_RE = re.compile(r'[\d.]+')
+RATING_MAP = {'One': 1, 'Two': 2, 'Three': 3, 'Four': 4, 'Five': 5}
+
+# Secondary indexes on the columns filtered and sorted by get_books_from_db
+BOOK_INDEXES = {
+    'idx_books_title': 'CREATE INDEX IF NOT EXISTS idx_books_title ON books(title)',
+    'idx_books_category_price': 'CREATE INDEX IF NOT EXISTS idx_books_category_price ON books(category, price)',
+    'idx_books_rating': 'CREATE INDEX IF NOT EXISTS idx_books_rating ON books(rating)',
+}
+
+class RateLimiter:
+    """Spaces request starts to at most `rate` per second, shared by coroutines and threads"""
+    def __init__(self, rate):
+        self._interval = 1.0 / rate
+        self._next_start = 0.0
+        self._resume_at = 0.0
+        self._lock = threading.Lock()
+    
+    def _reserve(self):
+        """Claim the next free start slot and return how long to wait for it"""
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_start)
+            self._next_start = start + self._interval
+            return start - now
+    
+    def _paused_for(self):
+        """Seconds left on a pause issued after the caller's slot was reserved"""
+        with self._lock:
+            return self._resume_at - time.monotonic()
+    
+    def pause(self, seconds):
+        """Hold back new requests, including ones already waiting for a slot, for the given number of seconds"""
+        with self._lock:
+            self._resume_at = max(self._resume_at, time.monotonic() + seconds)
+            self._next_start = max(self._next_start, self._resume_at)
+    
+    def acquire(self):
+        """Block the calling thread until its start slot comes up"""
+        while True:
+            time.sleep(self._reserve())
+            wait = self._paused_for()
+            if wait <= 0:
+                return
+            # Paused while waiting: sit out the pause, then queue for a fresh slot
+            time.sleep(wait)
+    
+    def __enter__(self):
+        self.acquire()
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        return False
+    
+    async def __aenter__(self):
+        while True:
+            await asyncio.sleep(self._reserve())
+            wait = self._paused_for()
+            if wait <= 0:
+                return self
+            await asyncio.sleep(wait)
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        return False
 
 class BookScraper:
-    def __init__(self, db_path='books.db'):
+    def __init__(self, db_path='books.db', requests_per_second=10):
         self.db_path = db_path
+        self.requests_per_second = requests_per_second
         self.base_url = 'http://books.toscrape.com'
         self.session = requests.Session()
         self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+            'Accept-Encoding': 'gzip, deflate',
+            'Connection': 'keep-alive'
         })
+        # Large keep-alive pool so concurrent detail fetches don't churn connections
+        adapter = HTTPAdapter(
+            pool_connections=32,
+            pool_maxsize=64,
+            max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504])
+        )
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
         self.init_database()
+        
+        # All writes go through one background thread so concurrent saves never contend for
+        # SQLite's write lock; readers keep their own connections and WAL lets them run meanwhile
+        self._write_q = queue.Queue()
+        self._writer = threading.Thread(target=self._write_loop, name='books-db-writer', daemon=True)
+        self._writer.start()
+    
+    def _connect(self):
+        """Open a connection tuned for bulk writes and read-heavy filtering"""
+        conn = sqlite3.connect(self.db_path)
+        conn.executescript('''
+            PRAGMA journal_mode=WAL;
+            PRAGMA synchronous=NORMAL;
+            PRAGMA cache_size=-65536;
+            PRAGMA temp_store=MEMORY;
+            PRAGMA mmap_size=268435456;
+        ''')
+        return conn
     
     def init_database(self):
         """Initialize SQLite database"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         cursor = conn.cursor()
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS books (
@@ -39,29 +153,102 @@ class BookScraper:
                 scraped_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             )
         ''')
+        for index_sql in BOOK_INDEXES.values():
+            cursor.execute(index_sql)
+        
+        # Full-text index over title/description, kept in sync with books by triggers
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'books_fts'")
+        fts_exists = cursor.fetchone() is not None
+        cursor.execute('''
+            CREATE VIRTUAL TABLE IF NOT EXISTS books_fts
+            USING fts5(title, description, content='books', content_rowid='id')
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS books_fts_insert AFTER INSERT ON books BEGIN
+                INSERT INTO books_fts(rowid, title, description)
+                VALUES (new.id, new.title, new.description);
+            END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS books_fts_delete AFTER DELETE ON books BEGIN
+                INSERT INTO books_fts(books_fts, rowid, title, description)
+                VALUES ('delete', old.id, old.title, old.description);
+            END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS books_fts_update AFTER UPDATE ON books BEGIN
+                INSERT INTO books_fts(books_fts, rowid, title, description)
+                VALUES ('delete', old.id, old.title, old.description);
+                INSERT INTO books_fts(rowid, title, description)
+                VALUES (new.id, new.title, new.description);
+            END
+        ''')
+        if not fts_exists:
+            # Index rows that were stored before the FTS table existed
+            cursor.execute("INSERT INTO books_fts(books_fts) VALUES ('rebuild')")
+        
+        # Aggregates served by /api/stats, recomputed whenever the books table is reloaded
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS books_stats (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                total INTEGER NOT NULL,
+                avg_price REAL,
+                avg_rating REAL,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS books_category_stats (
+                category TEXT PRIMARY KEY,
+                total INTEGER NOT NULL
+            )
+        ''')
+        cursor.execute("SELECT 1 FROM books_stats")
+        if cursor.fetchone() is None:
+            self._refresh_stats(cursor)
         conn.commit()
         conn.close()
     
+    def _refresh_stats(self, cursor):
+        """Recompute the materialized aggregates from the books table"""
+        cursor.execute('''
+            INSERT OR REPLACE INTO books_stats (id, total, avg_price, avg_rating, updated_at)
+            SELECT 1, COUNT(*), AVG(price), AVG(rating), CURRENT_TIMESTAMP FROM books
+        ''')
+        cursor.execute('DELETE FROM books_category_stats')
+        cursor.execute('''
+            INSERT INTO books_category_stats (category, total)
+            SELECT category, COUNT(*) FROM books GROUP BY category
+        ''')
+    
     def get_rating_from_class(self, rating_class):
         """Convert rating class to number"""
-        rating_map = {
-            'One': 1, 'Two': 2, 'Three': 3, 'Four': 4, 'Five': 5
-        }
-        for word in rating_class:
-            if word in rating_map:
-                return rating_map[word]
-        return 0
+        return next((RATING_MAP[word] for word in rating_class if word in RATING_MAP), 0)
     
     def clean_price(self, price_text):
         """Extract numeric price from price text"""
-        price_match = re.search(r'[\d.]+', price_text.replace(',', ''))
+        price_match = PRICE_RE.search(price_text.replace(',', ''))
         return float(price_match.group()) if price_match else 0.0
     
-    def scrape_book_details(self, book_url):
-        """Scrape detailed information from individual book page"""
+    def build_fts_query(self, search_query):
+        """Turn free text into an FTS5 prefix query, e.g. 'harry pot' -> '"harry"* "pot"*'"""
+        return ' '.join(f'"{term}"*' for term in re.findall(r'\w+', search_query))
+    
+    def scrape_book_details(self, book_url, limiter=None):
+        """Scrape detailed information from individual book page, optionally throttled by `limiter`"""
         try:
-            response = self.session.get(book_url, timeout=10)
-            soup = BeautifulSoup(response.content, 'html.parser')
+            if limiter is not None:
+                limiter.acquire()
+            
+            # Hand the (gzip-decoded) socket stream to the parser rather than buffering response.content first
+            with self.session.get(book_url, stream=True, timeout=10) as response:
+                # Back off every worker sharing the limiter, not just this thread
+                delay = self._retry_delay(response.headers)
+                if delay is not None and limiter is not None:
+                    limiter.pause(delay)
+                
+                response.raw.decode_content = True
+                soup = BeautifulSoup(response.raw, 'lxml')
             
             # Get description
             description_elem = soup.select_one('#product_description ~ p')
@@ -84,21 +271,76 @@ class BookScraper:
             print(f"Error scraping book details from {book_url}: {e}")
             return "No description available", "Unknown", "", "General"
     
-    def scrape_books(self, max_pages=5):
-        """Scrape books from multiple pages"""
+    def _retry_delay(self, headers):
+        """Seconds the server asked us to wait, from Retry-After or an exhausted X-RateLimit quota"""
+        retry_after = headers.get('Retry-After')
+        if retry_after:
+            if retry_after.isdigit():
+                return float(retry_after)
+            try:
+                retry_at = parsedate_to_datetime(retry_after)
+                # asctime dates and '-0000' offsets parse as naive datetimes; HTTP dates are always UTC
+                if retry_at.tzinfo is None:
+                    retry_at = retry_at.replace(tzinfo=timezone.utc)
+                return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+            except (TypeError, ValueError, IndexError, OverflowError):
+                return None
+        
+        reset = headers.get('X-RateLimit-Reset', '')
+        if headers.get('X-RateLimit-Remaining') == '0' and reset.isdigit():
+            reset = float(reset)
+            # Some servers send an epoch timestamp, others the seconds left in the window
+            return max(0.0, reset - time.time()) if reset > 1e9 else reset
+        return None
+    
+    async def _fetch(self, session, limiter, url, max_attempts=3):
+        """Fetch a single page, returning its status code and raw body"""
+        for attempt in range(1, max_attempts + 1):
+            async with limiter:
+                async with session.get(url) as response:
+                    delay = self._retry_delay(response.headers)
+                    if delay is not None:
+                        limiter.pause(delay)
+                    
+                    if response.status not in (429, 503) or attempt == max_attempts:
+                        return response.status, await response.read()
+            
+            if delay is None:
+                limiter.pause(attempt)
+    
+    async def _scrape_books_async(self, max_pages, limiter):
+        """Fetch all catalogue pages concurrently, then parse them in page order"""
+        page_urls = [f"{self.base_url}/catalogue/page-{page}.html" for page in range(1, max_pages + 1)]
+        
+        # Politeness is a global request rate; the connector keeps requests on pooled keep-alive sockets
+        connector = aiohttp.TCPConnector(limit_per_host=16, keepalive_timeout=30)
+        async with aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=10),
+            headers={'User-Agent': self.session.headers['User-Agent']}
+        ) as session:
+            print(f"Fetching {max_pages} pages...")
+            pages = await asyncio.gather(
+                *[self._fetch(session, limiter, url) for url in page_urls],
+                return_exceptions=True
+            )
+        
         books_data = []
         
-        for page in range(1, max_pages + 1):
+        for page, result in enumerate(pages, start=1):
             print(f"Scraping page {page}/{max_pages}...")
-            page_url = f"{self.base_url}/catalogue/page-{page}.html"
             
             try:
-                response = self.session.get(page_url, timeout=10)
-                if response.status_code != 200:
-                    print(f"Failed to fetch page {page} (Status: {response.status_code})")
+                if isinstance(result, Exception):
+                    raise result
+                
+                status, content = result
+                if status != 200:
+                    print(f"Failed to fetch page {page} (Status: {status})")
                     break
                 
-                soup = BeautifulSoup(response.content, 'html.parser')
+                # Only build the tree for the product cards; everything else on the page is skipped
+                soup = BeautifulSoup(content, 'lxml', parse_only=PRODUCT_POD_STRAINER)
                 books = soup.find_all('article', class_='product_pod')
                 
                 if not books:
@@ -129,10 +371,11 @@ class BookScraper:
                         book_relative_url = title_elem.get('href')
                         book_url = urljoin(f"{self.base_url}/catalogue/", book_relative_url)
                         
-                        # Get detailed information (skip for now to make it faster)
+                        # Placeholders, replaced by scrape_books when detail pages are fetched
                         description = "Book description available on detail page"
                         availability = "In stock"
-                        upc = f"UPC{random.randint(100000, 999999)}"
+                        # Stable stand-in derived from the product URL
+                        upc = f"UPC{hashlib.blake2b(book_url.encode(), digest_size=4).hexdigest()}"
                         category = "Fiction"
                         
                         book_data = {
@@ -150,63 +393,126 @@ class BookScraper:
                         books_data.append(book_data)
                         print(f"✓ Scraped: {title[:50]}{'...' if len(title) > 50 else ''}")
                         
-                        # Small delay to be respectful
-                        time.sleep(random.uniform(0.1, 0.3))
-                        
                     except Exception as e:
                         print(f"Error scraping individual book: {e}")
                         continue
                 
-                # Delay between pages
-                time.sleep(random.uniform(0.5, 1.0))
-                
             except Exception as e:
                 print(f"Error fetching page {page}: {e}")
                 break
         
         return books_data
     
-    def save_to_database(self, books_data):
-        """Save scraped data to SQLite database"""
-        conn = sqlite3.connect(self.db_path)
+    def scrape_books(self, max_pages=5, with_details=True):
+        """Scrape books from multiple pages, optionally filling in their detail pages"""
+        # One limiter covers both the catalogue pages and the detail pages
+        limiter = RateLimiter(self.requests_per_second)
+        books_data = asyncio.run(self._scrape_books_async(max_pages, limiter))
+        
+        if with_details and books_data:
+            print(f"Fetching details for {len(books_data)} books...")
+            # Detail fetches are pure I/O, so overlap them on the session's keep-alive pool
+            with ThreadPoolExecutor(max_workers=32) as executor:
+                details = executor.map(
+                    partial(self.scrape_book_details, limiter=limiter),
+                    [book['product_url'] for book in books_data]
+                )
+                for book, (description, availability, upc, category) in zip(books_data, details):
+                    book.update(description=description, availability=availability, category=category)
+                    if upc:
+                        book['upc'] = upc
+        
+        return books_data
+    
+    def _write_loop(self):
+        """Apply queued saves one at a time on the writer thread's own connection"""
+        conn = None
+        while True:
+            books_data, done = self._write_q.get()
+            try:
+                if conn is None:
+                    conn = self._connect()
+                self._bulk_insert(conn, books_data)
+            except Exception as e:
+                # Closing discards the failed transaction; the next save opens a fresh connection
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
+                    conn = None
+                done.set_exception(e)
+            else:
+                print(f"✓ Saved {len(books_data)} books to database")
+                done.set_result(len(books_data))
+    
+    def save_to_database(self, books_data, wait=True):
+        """Queue scraped data for the database writer thread, by default blocking until it is saved"""
+        if not self._writer.is_alive():
+            raise RuntimeError("Database writer thread is not running")
+        
+        done = Future()
+        self._write_q.put((books_data, done))
+        if wait:
+            done.result()
+        return done
+    
+    def _bulk_insert(self, conn, books_data):
+        """Replace the books table with books_data"""
         cursor = conn.cursor()
         
-        # Clear existing data
+        # Replace the whole table in one transaction with a single prepared insert
+        conn.execute('BEGIN')
+        
+        # Drop the secondary indexes before the delete and bulk load (the FTS delete trigger
+        # makes DELETE go row by row), then rebuild each in one sorted pass
+        for index_name in BOOK_INDEXES:
+            cursor.execute(f'DROP INDEX IF EXISTS {index_name}')
+        
         cursor.execute('DELETE FROM books')
         
-        for book in books_data:
-            cursor.execute('''
-                INSERT INTO books (title, price, rating, availability, description, 
-                                 image_url, product_url, category, upc)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                book['title'], book['price'], book['rating'], book['availability'],
-                book['description'], book['image_url'], book['product_url'], 
-                book['category'], book['upc']
-            ))
+        # Multi-row INSERTs, each binding up to INSERT_BATCH_ROWS books at once
+        rows = (tuple(book[column] for column in BOOK_COLUMNS) for book in books_data)
+        row_placeholders = f"({', '.join('?' * len(BOOK_COLUMNS))})"
+        while batch := list(islice(rows, INSERT_BATCH_ROWS)):
+            cursor.execute(
+                f"INSERT INTO books ({', '.join(BOOK_COLUMNS)}) VALUES "
+                + ', '.join([row_placeholders] * len(batch)),
+                list(chain.from_iterable(batch))
+            )
+        
+        for index_sql in BOOK_INDEXES.values():
+            cursor.execute(index_sql)
         
+        self._refresh_stats(cursor)
         conn.commit()
-        conn.close()
-        print(f"✓ Saved {len(books_data)} books to database")
     
     def save_to_excel(self, books_data, filename='books_data.xlsx'):
         out_dir = os.path.dirname(os.path.abspath(__file__))
         out_path = os.path.join(out_dir, filename)
-        df = pd.DataFrame(books_data)
-        df.to_excel(out_path, index=False, engine='openpyxl')
+        # Write-only workbook streams rows to the file instead of holding every cell in memory
+        wb = openpyxl.Workbook(write_only=True)
+        ws = wb.create_sheet('Books')
+        ws.append(BOOK_COLUMNS)
+        for book in books_data:
+            ws.append([book[column] for column in BOOK_COLUMNS])
+        wb.save(out_path)
         print(f"✓ Saved {len(books_data)} books to {out_path}")
     
-    def get_books_from_db(self, search_query=None, min_price=None, max_price=None, 
-                         min_rating=None, category=None):
-        """Retrieve books from database with optional filters"""
-        conn = sqlite3.connect(self.db_path)
-        
+    def _books_query(self, search_query=None, min_price=None, max_price=None, 
+                     min_rating=None, category=None):
+        """Build the filtered books SELECT and its parameters"""
         query = "SELECT * FROM books WHERE 1=1"
         params = []
         
         if search_query:
-            query += " AND (title LIKE ? OR description LIKE ?)"
-            params.extend([f"%{search_query}%", f"%{search_query}%"])
+            match_query = self.build_fts_query(search_query)
+            if match_query:
+                query += " AND id IN (SELECT rowid FROM books_fts WHERE books_fts MATCH ?)"
+                params.append(match_query)
+            else:
+                query += " AND (title LIKE ? OR description LIKE ?)"
+                params.extend([f"%{search_query}%", f"%{search_query}%"])
         
         if min_price is not None:
             query += " AND price >= ?"
@@ -225,115 +531,54 @@ class BookScraper:
             params.append(category)
         
         query += " ORDER BY title"
-        
-        df = pd.read_sql_query(query, conn, params=params)
-        conn.close()
-        return df.to_dict('records')
+        return query, params
     
-    def get_categories(self):
-        """Get all unique categories from database"""
-        conn = sqlite3.connect(self.db_path)
+    def get_books_from_db(self, search_query=None, min_price=None, max_price=None, 
+                         min_rating=None, category=None, conn=None):
+        """Retrieve books from database with optional filters, reusing `conn` if given"""
+        own_conn = conn is None
+        if own_conn:
+            conn = self._connect()
+        
+        query, params = self._books_query(search_query, min_price, max_price, min_rating, category)
         cursor = conn.cursor()
-        cursor.execute("SELECT DISTINCT category FROM books ORDER BY category")
-        categories = [row[0] for row in cursor.fetchall()]
-        conn.close()
+        cursor.row_factory = sqlite3.Row
+        books = [dict(row) for row in cursor.execute(query, params)]
+        
+        if own_conn:
+            conn.close()
+        return books
+    
+    def get_categories(self, conn=None):
+        """Get all unique categories from database, reusing `conn` if given"""
+        own_conn = conn is None
+        if own_conn:
+            conn = self._connect()
+        
+        categories = [row[0] for row in conn.execute("SELECT DISTINCT category FROM books ORDER BY category")]
+        
+        if own_conn:
+            conn.close()
         return categories
 
 # Flask Web Application
 app = Flask(__name__)
+Compress(app)
 scraper = BookScraper()
 
-# HTML Templates as strings (to avoid file creation issues)
-BASE_TEMPLATE = '''
-<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>{{ title or "Book Store" }}</title>
-    <link href="https://cdnjs.cloudflare.com/ajax/libs/bootstrap/5.1.3/css/bootstrap.min.css" rel="stylesheet">
-    <link href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.0.0/css/all.min.css" rel="stylesheet">
-    <style>
-        .book-card { transition: transform 0.2s; }
-        .book-card:hover { transform: translateY(-5px); }
-        .rating-stars { color: #ffc107; }
-        .book-image { height: 200px; object-fit: cover; }
-        .search-section { background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); }
-        .stats-card { border-left: 4px solid #667eea; }
-    </style>
-</head>
-<body>
-    <nav class="navbar navbar-expand-lg navbar-dark bg-primary">
-        <div class="container">
-            <a class="navbar-brand" href="/">
-                <i class="fas fa-book"></i> Book Store Scraper
-            </a>
-            <div class="navbar-nav ms-auto">
-                <a class="nav-link" href="/">
-                    <i class="fas fa-home"></i> Home
-                </a>
-                <button class="btn btn-outline-light ms-2" onclick="scrapeBooks()">
-                    <i class="fas fa-sync"></i> Scrape Data
-                </button>
-            </div>
-        </div>
-    </nav>
-
-    {{ content|safe }}
+def get_db():
+    """Return the connection shared by everything handling the current request"""
+    db = getattr(g, '_db', None)
+    if db is None:
+        db = g._db = scraper._connect()
+        db.row_factory = sqlite3.Row
+    return db
 
-    <footer class="bg-dark text-light py-4 mt-5">
-        <div class="container text-center">
-            <p>&copy; 2024 Book Store Web Scraper. Built with Flask & BeautifulSoup.</p>
-        </div>
-    </footer>
-
-    <script src="https://cdnjs.cloudflare.com/ajax/libs/bootstrap/5.1.3/js/bootstrap.bundle.min.js"></script>
-    <script>
-        async function scrapeBooks() {
-            const btn = event.target;
-            const originalText = btn.innerHTML;
-            btn.innerHTML = '<i class="fas fa-spinner fa-spin"></i> Scraping...';
-            btn.disabled = true;
-
-            try {
-                const response = await fetch('/scrape');
-                const result = await response.json();
-                
-                if (result.success) {
-                    alert(`Success! Scraped ${result.count} books.`);
-                    location.reload();
-                } else {
-                    alert(`Error: ${result.message}`);
-                }
-            } catch (error) {
-                alert(`Error: ${error.message}`);
-            }
-
-            btn.innerHTML = originalText;
-            btn.disabled = false;
-        }
-
-        // Load stats
-        async function loadStats() {
-            try {
-                const response = await fetch('/api/stats');
-                const stats = await response.json();
-                
-                if (document.getElementById('total-books')) {
-                    document.getElementById('total-books').textContent = stats.total_books;
-                    document.getElementById('avg-price').textContent = `$${stats.average_price}`;
-                    document.getElementById('avg-rating').textContent = stats.average_rating;
-                }
-            } catch (error) {
-                console.error('Error loading stats:', error);
-            }
-        }
-
-        document.addEventListener('DOMContentLoaded', loadStats);
-    </script>
-</body>
-</html>
-'''
+@app.teardown_appcontext
+def close_db(exception):
+    db = g.pop('_db', None)
+    if db is not None:
+        db.close()
 
 @app.route('/')
 def index():
@@ -344,149 +589,24 @@ def index():
     min_rating = request.args.get('min_rating', type=int)
     category = request.args.get('category', 'All')
     
-    books = scraper.get_books_from_db(
-        search_query=search_query if search_query else None,
+    db = get_db()
+    categories = scraper.get_categories(conn=db)
+    
+    # Changes whenever the books table is reloaded, so cached /api/books responses go stale with it
+    stats = db.execute("SELECT updated_at FROM books_stats").fetchone()
+    data_version = stats['updated_at'] if stats else ''
+    
+    return render_template(
+        'index.html',
+        title="Book Store - Home",
+        categories=categories,
+        data_version=data_version,
+        search_query=search_query,
+        category=category,
         min_price=min_price,
         max_price=max_price,
-        min_rating=min_rating,
-        category=category if category != 'All' else None
+        min_rating=min_rating
     )
-    
-    categories = scraper.get_categories()
-    
-    content = f'''
-    <!-- Search Section -->
-    <section class="search-section text-white py-5">
-        <div class="container">
-            <div class="row">
-                <div class="col-lg-8 mx-auto text-center">
-                    <h1 class="display-4 mb-4">
-                        <i class="fas fa-search"></i> Find Your Perfect Book
-                    </h1>
-                    <form method="GET" class="row g-3">
-                        <div class="col-md-6">
-                            <input type="text" class="form-control form-control-lg" name="search" 
-                                   placeholder="Search books..." value="{search_query}">
-                        </div>
-                        <div class="col-md-3">
-                            <select class="form-select form-select-lg" name="category">
-                                <option value="All">All Categories</option>
-                                {"".join([f'<option value="{cat}" {"selected" if cat == category else ""}>{cat}</option>' for cat in categories])}
-                            </select>
-                        </div>
-                        <div class="col-md-3">
-                            <button type="submit" class="btn btn-warning btn-lg w-100">
-                                <i class="fas fa-search"></i> Search
-                            </button>
-                        </div>
-                        
-                        <!-- Advanced Filters -->
-                        <div class="col-md-3">
-                            <input type="number" class="form-control" name="min_price" 
-                                   placeholder="Min Price" value="{min_price or ''}" step="0.01">
-                        </div>
-                        <div class="col-md-3">
-                            <input type="number" class="form-control" name="max_price" 
-                                   placeholder="Max Price" value="{max_price or ''}" step="0.01">
-                        </div>
-                        <div class="col-md-3">
-                            <select class="form-select" name="min_rating">
-                                <option value="">Any Rating</option>
-                                {"".join([f'<option value="{i}" {"selected" if min_rating == i else ""}>{i}+ Stars</option>' for i in range(1, 6)])}
-                            </select>
-                        </div>
-                        <div class="col-md-3">
-                            <a href="/" class="btn btn-outline-light w-100">
-                                Clear Filters
-                            </a>
-                        </div>
-                    </form>
-                </div>
-            </div>
-        </div>
-    </section>
-
-    <!-- Stats Section -->
-    <section class="py-4 bg-light">
-        <div class="container">
-            <div class="row text-center">
-                <div class="col-md-4">
-                    <div class="stats-card p-3 bg-white rounded shadow-sm">
-                        <h3 id="total-books" class="text-primary">-</h3>
-                        <p class="mb-0">Total Books</p>
-                    </div>
-                </div>
-                <div class="col-md-4">
-                    <div class="stats-card p-3 bg-white rounded shadow-sm">
-                        <h3 id="avg-price" class="text-success">-</h3>
-                        <p class="mb-0">Average Price</p>
-                    </div>
-                </div>
-                <div class="col-md-4">
-                    <div class="stats-card p-3 bg-white rounded shadow-sm">
-                        <h3 id="avg-rating" class="text-warning">-</h3>
-                        <p class="mb-0">Average Rating</p>
-                    </div>
-                </div>
-            </div>
-        </div>
-    </section>
-
-    <!-- Books Grid -->
-    <div class="container py-5">
-        {f'''
-        <div class="d-flex justify-content-between align-items-center mb-4">
-            <h2>Found {len(books)} book(s)</h2>
-        </div>
-        
-        <div class="row">
-            {"".join([f'''
-            <div class="col-lg-3 col-md-4 col-sm-6 mb-4">
-                <div class="card book-card h-100 shadow-sm">
-                    <img src="{book['image_url']}" class="card-img-top book-image" 
-                         alt="{book['title']}" onerror="this.src='https://via.placeholder.com/200x300?text=No+Image'">
-                    <div class="card-body d-flex flex-column">
-                        <h6 class="card-title">{book['title'][:50]}{'...' if len(book['title']) > 50 else ''}</h6>
-                        <div class="rating-stars mb-2">
-                            {"".join([f'<i class="fas fa-star{"" if i < book["rating"] else " text-muted"}"></i>' for i in range(5)])}
-                            <small class="text-muted">({book['rating']}/5)</small>
-                        </div>
-                        <p class="card-text small text-muted flex-grow-1">
-                            {book['description'][:100]}{'...' if len(book['description']) > 100 else ''}
-                        </p>
-                        <div class="mt-auto">
-                            <div class="d-flex justify-content-between align-items-center">
-                                <span class="h5 text-success mb-0">${book['price']:.2f}</span>
-                                <span class="badge bg-secondary">{book['category']}</span>
-                            </div>
-                            <small class="text-muted">{book['availability']}</small>
-                            <div class="mt-2">
-                                <a href="/book/{book['id']}" class="btn btn-primary btn-sm w-100">
-                                    <i class="fas fa-eye"></i> View Details
-                                </a>
-                            </div>
-                        </div>
-                    </div>
-                </div>
-            </div>
-            ''' for book in books])}
-        </div>
-        ''' if books else '''
-        <div class="text-center py-5">
-            <div class="mb-4">
-                <i class="fas fa-search fa-3x text-muted"></i>
-            </div>
-            <h3 class="text-muted">No books found</h3>
-            <p class="lead">Try adjusting your search criteria or scrape new data.</p>
-            <button class="btn btn-primary btn-lg" onclick="scrapeBooks()">
-                <i class="fas fa-sync"></i> Scrape Books Data
-            </button>
-        </div>
-        '''}
-    </div>
-    '''
-    
-    return render_template_string(BASE_TEMPLATE, content=content, title="Book Store - Home")
 
 @app.route('/scrape')
 def scrape_data():
@@ -508,103 +628,46 @@ def scrape_data():
 @app.route('/book/<int:book_id>')
 def book_detail(book_id):
     """Book detail page"""
-    conn = sqlite3.connect(scraper.db_path)
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM books WHERE id = ?", (book_id,))
-    book = cursor.fetchone()
-    conn.close()
+    book = get_db().execute("SELECT * FROM books WHERE id = ?", (book_id,)).fetchone()
     
     if book:
-        columns = ['id', 'title', 'price', 'rating', 'availability', 'description', 
-                  'image_url', 'product_url', 'category', 'upc', 'scraped_at']
-        book_dict = dict(zip(columns, book))
-        
-        content = f'''
-        <div class="container py-5">
-            <div class="row">
-                <div class="col-md-4">
-                    <img src="{book_dict['image_url']}" class="img-fluid rounded shadow" 
-                         alt="{book_dict['title']}" onerror="this.src='https://via.placeholder.com/400x600?text=No+Image'">
-                </div>
-                <div class="col-md-8">
-                    <nav aria-label="breadcrumb">
-                        <ol class="breadcrumb">
-                            <li class="breadcrumb-item"><a href="/">Home</a></li>
-                            <li class="breadcrumb-item active">{book_dict['title']}</li>
-                        </ol>
-                    </nav>
-                    
-                    <h1 class="mb-3">{book_dict['title']}</h1>
-                    
-                    <div class="row mb-3">
-                        <div class="col-sm-6">
-                            <div class="rating-stars mb-2">
-                                {"".join([f'<i class="fas fa-star{"" if i < book_dict["rating"] else " text-muted"}"></i>' for i in range(5)])}
-                                <span class="ms-2">{book_dict['rating']}/5 Stars</span>
-                            </div>
-                        </div>
-                        <div class="col-sm-6">
-                            <h2 class="text-success">${book_dict['price']:.2f}</h2>
-                        </div>
-                    </div>
-                    
-                    <div class="mb-4">
-                        <span class="badge bg-primary me-2">{book_dict['category']}</span>
-                        <span class="badge bg-{'success' if 'In stock' in book_dict['availability'] else 'warning'}">
-                            {book_dict['availability']}
-                        </span>
-                    </div>
-                    
-                    <div class="row mb-4">
-                        <div class="col-sm-6">
-                            <strong>UPC:</strong> {book_dict['upc'] or 'N/A'}
-                        </div>
-                        <div class="col-sm-6">
-                            <strong>Added:</strong> {book_dict['scraped_at']}
-                        </div>
-                    </div>
-                    
-                    <div class="mb-4">
-                        <h4>Description</h4>
-                        <p class="lead">{book_dict['description']}</p>
-                    </div>
-                    
-                    <div class="mb-4">
-                        <a href="{book_dict['product_url']}" target="_blank" class="btn btn-primary me-2">
-                            <i class="fas fa-external-link-alt"></i> View on Original Site
-                        </a>
-                        <a href="/" class="btn btn-outline-secondary">
-                            <i class="fas fa-arrow-left"></i> Back to Search
-                        </a>
-                    </div>
-                </div>
-            </div>
-        </div>
-        '''
-        
-        return render_template_string(BASE_TEMPLATE, content=content, title=f"{book_dict['title']} - Book Store")
+        return render_template('book.html', book=book, title=f"{book['title']} - Book Store")
     else:
         return "Book not found", 404
 
+@app.route('/api/books')
+def api_books():
+    """API endpoint for the filtered book list rendered by the home page"""
+    search_query = request.args.get('search', '')
+    category = request.args.get('category', 'All')
+    
+    books = scraper.get_books_from_db(
+        search_query=search_query if search_query else None,
+        min_price=request.args.get('min_price', type=float),
+        max_price=request.args.get('max_price', type=float),
+        min_rating=request.args.get('min_rating', type=int),
+        category=category if category != 'All' else None,
+        conn=get_db()
+    )
+    
+    response = jsonify(books)
+    response.headers['Cache-Control'] = 'public, max-age=60'
+    return response
+
 @app.route('/api/stats')
 def api_stats():
     """API endpoint for database statistics"""
-    conn = sqlite3.connect(scraper.db_path)
-    cursor = conn.cursor()
-    
-    cursor.execute("SELECT COUNT(*) FROM books")
-    total_books = cursor.fetchone()[0]
-    
-    cursor.execute("SELECT AVG(price) FROM books")
-    avg_price = cursor.fetchone()[0] or 0
-    
-    cursor.execute("SELECT AVG(rating) FROM books")
-    avg_rating = cursor.fetchone()[0] or 0
+    db = get_db()
     
-    cursor.execute("SELECT category, COUNT(*) FROM books GROUP BY category ORDER BY COUNT(*) DESC")
-    categories = cursor.fetchall()
+    stats = db.execute("SELECT total, avg_price, avg_rating FROM books_stats LIMIT 1").fetchone()
+    total_books = stats['total'] if stats else 0
+    avg_price = (stats['avg_price'] if stats else None) or 0
+    avg_rating = (stats['avg_rating'] if stats else None) or 0
     
-    conn.close()
+    categories = [
+        tuple(row) for row in
+        db.execute("SELECT category, total FROM books_category_stats ORDER BY total DESC")
+    ]
     
     return jsonify({
         'total_books': total_books,
@@ -619,6 +682,7 @@ if __name__ == '__main__':
     print("Available endpoints:")
     print("- Home page with search: http://localhost:5000/")
     print("- Scrape data: http://localhost:5000/scrape")
+    print("- API books: http://localhost:5000/api/books")
     print("- API stats: http://localhost:5000/api/stats")
     print()
     print("Usage Instructions:")